@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 # encoding: utf-8
 import io
+import itertools
+import json
 import sys
-from typing import List
+import textwrap
+from typing import List, Tuple
 
 import click
 import npyscreen
@@ -22,13 +25,67 @@ class CancelForm(npyscreen.ActionFormMinimal):
 
 
 class IndicatorEvaluationReaderApplication(npyscreen.NPSAppManaged):
-    def __init__(self, bundle: stix2.Bundle):
-        self.store = stix2.MemoryStore(bundle)
+    def __init__(self, objects: list, journal_opinions: List[stix2.Opinion] = ()):
+        # fold in opinions judge_intel journalled but hadn't folded back
+        # into the bundle yet
+        known_ids = {obj.id for obj in objects}
+        new_opinions = [opinion for opinion in journal_opinions
+                        if opinion.id not in known_ids]
+
+        # bucket the objects by type in one pass up front – everything the
+        # forms need afterwards is an O(1) lookup, with no MemoryStore
+        # index build or Python-level filter scans in between.
+        self.by_type = {}
+        # bind the bound method once – for bundles with tens of thousands
+        # of objects this loop is the startup bottleneck, and the repeated
+        # attribute walk is a measurable slice of it
+        bucket = self.by_type.setdefault
+        for obj in objects + new_opinions:
+            bucket(obj.type, []).append(obj)
+
+        # invert the opinions once as well, so viewing an indicator is
+        # O(its opinions) instead of O(bundle).
+        self.identity_by_id = {identity.id: identity
+                               for identity in self.by_type.get('identity', [])}
+        self.opinions_by_ref = {}
+        self.display_by_opinion = {}
+        by_ref = self.opinions_by_ref.setdefault
+        for opinion in self.by_type.get('opinion', []):
+            for ref in opinion.object_refs:
+                by_ref(ref, []).append(opinion)
+            # created_by_ref is optional, and the referenced identity may
+            # not be in the bundle – fall back to whatever we do know
+            creator = self.identity_by_id.get(opinion.get('created_by_ref'))
+            if creator is not None:
+                creator_name = creator.name
+                # identity_class is optional in STIX 2.1 as well
+                creator_class = creator.get('identity_class', 'unknown').title()
+            else:
+                creator_name = opinion.get('created_by_ref', 'unknown')
+                creator_class = 'Unknown'
+            # title-casing and strftime are the expensive parts of rendering
+            # an opinion; do them once here instead of per viewer visit
+            self.display_by_opinion[opinion.id] = (
+                creator_name,
+                creator_class,
+                opinion.opinion.replace('-', ' ').title(),
+                opinion.created.strftime('%Y-%m-%d %H:%M:%S'),
+                # textwrap.indent does the splitlines/join dance in one
+                # C-backed call – and, unlike the old hand-rolled join,
+                # doesn't indent the first line twice. explanation is
+                # optional, so go through .get()
+                textwrap.indent(opinion.get('explanation', ''), '    '),
+            )
+        for opinions in self.opinions_by_ref.values():
+            opinions.sort(key=lambda opinion: opinion.created, reverse=True)
+
         super().__init__()
 
     def onStart(self):
-        self.addForm('MAIN', IndicatorSelectionForm, store=self.store)
-        self.addForm('INDICATOR', IndicatorViewerForm, store=self.store)
+        self.addForm('MAIN', IndicatorSelectionForm, indicators=self.by_type.get('indicator', []))
+        self.addForm('INDICATOR', IndicatorViewerForm,
+                     opinions_by_ref=self.opinions_by_ref,
+                     display_by_opinion=self.display_by_opinion)
 
 
 class IndicatorSelectionForm(CancelForm):
@@ -36,8 +93,7 @@ class IndicatorSelectionForm(CancelForm):
 
     def __init__(self, name=None, parentApp=None, framed=None, help=None,
                  color='FORMDEFAULT', widget_list=None, cycle_widgets=False,
-                 *args, store: stix2.MemoryStore, **keywords):
-        indicators = store.query([stix2.Filter('type', '=', 'indicator')])
+                 *args, indicators: list, **keywords):
         self._provided_indicators = tuple(indicators)
         super().__init__(name, parentApp, framed, help, color, widget_list,
                          cycle_widgets, *args, **keywords)
@@ -54,12 +110,22 @@ class IndicatorSelectionForm(CancelForm):
 
 
 class IndicatorSelection(npyscreen.MultiSelectAction):
+    def __init__(self, *args, **kwargs):
+        # format each row once – npyscreen calls display_value on every
+        # redraw, and the labels never change after construction
+        self._labels = {indicator.id: f'{indicator.name}\n\t{indicator.id}'
+                        for indicator in kwargs.get('values') or ()}
+        super().__init__(*args, **kwargs)
+        # the parent app never changes for the life of the widget; cache it
+        # instead of walking the widget-parent chain on every interaction
+        self._parent_app = self.find_parent_app()
+
     def display_value(self, indicator: stix2.Indicator) -> str:
-        return f'{indicator.name}\n\t{indicator.id}'
+        return self._labels[indicator.id]
 
     def actionHighlighted(self, indicator, key_press):
         # NOTE: this is a bit of a misnomer: "highlighted" is "pressed enter/space on"
-        parent_app = self.find_parent_app()
+        parent_app = self._parent_app
         parent_app.getForm('INDICATOR').set_indicator(indicator)
         parent_app.switchForm('INDICATOR')
 
@@ -72,10 +138,12 @@ class IndicatorViewerForm(npyscreen.ActionFormMinimal):
 
     def __init__(self,
                  *args,
-                 store: stix2.MemoryStore,
+                 opinions_by_ref: dict,
+                 display_by_opinion: dict,
                  indicator: stix2.Indicator = None,
                  **kwargs):
-        self.store = store
+        self.opinions_by_ref = opinions_by_ref
+        self.display_by_opinion = display_by_opinion
         self.set_indicator(indicator)
         super().__init__(*args, **kwargs)
 
@@ -85,51 +153,79 @@ class IndicatorViewerForm(npyscreen.ActionFormMinimal):
             self.buffer.name = f'Opinions: {self.indicator.name} ({self.indicator.id})'
             self.buffer.clearBuffer()
 
-            opinions = self.store.query([
-                stix2.Filter('type', '=', 'opinion'),
-                stix2.Filter('object_refs', 'contains', self.indicator.id),
-            ])
-            opinions.sort(key=lambda opinion: opinion.created, reverse=True)
-
-            for opinion in opinions:
-                opinion: stix2.Opinion
-
-                creator = self.store.creator_of(opinion)
-                opinion_text = opinion.opinion.replace('-', ' ').title()
-                evaluated_at = opinion.created.strftime('%Y-%m-%d %H:%M:%S')
-
-                indent = '    '
-                explanation = indent + '\n'.join(indent + line
-                                                 for line in opinion.explanation.splitlines())
-
-                self.buffer.buffer([
-                    f'# {creator.name} ({creator.identity_class.title()})',
-                    f'  Opinion on effectiveness: {opinion_text}',
-                    f'  Evaluated at: {evaluated_at}',
-                    f'',
-                    f'{explanation}',
-                    f'',
-                    f'',
-                ], scroll_end=False)
+            opinions = self.opinions_by_ref.get(self.indicator.id, [])
+
+            # flatten with itertools rather than per-opinion extend calls,
+            # and make one buffer() call for the whole batch – the pager
+            # re-renders on every append, so feeding it per-opinion is
+            # O(opinions) refreshes.
+            lines = list(itertools.chain.from_iterable(
+                self._format_opinion(opinion) for opinion in opinions))
+            self.buffer.buffer(lines, scroll_end=False)
+
+    def _format_opinion(self, opinion: stix2.Opinion) -> Tuple[str, ...]:
+        (creator_name, creator_class, opinion_text,
+         evaluated_at, explanation) = self.display_by_opinion[opinion.id]
+
+        return (
+            f'# {creator_name} ({creator_class})',
+            f'  Opinion on effectiveness: {opinion_text}',
+            f'  Evaluated at: {evaluated_at}',
+            '',
+            explanation,
+            '',
+            '',
+        )
 
     def create(self):
+        self._parent_app = self.find_parent_app()
         self.buffer: npyscreen.TitleBufferPager = self.add(
             npyscreen.TitleBufferPager,
             name='Opinions',
         )
 
     def on_ok(self):
-        parent_app = self.find_parent_app()
-        parent_app.switchForm('MAIN')
+        self._parent_app.switchForm('MAIN')
+
+
+def load_opinion_journal(path: str) -> List[stix2.Opinion]:
+    """Load opinions judge_intel appended to its sidecar journal, if any."""
+    try:
+        journal = open(path + '.opinions.ndjson')
+    except OSError:
+        return []
+
+    opinions = []
+    with journal:
+        for line in journal:
+            if not line.strip():
+                continue
+            try:
+                opinions.append(stix2.parse(line, version='2.1'))
+            except Exception:
+                # an interrupted append can tear the final line; everything
+                # before it is still good
+                break
+    return opinions
 
 
 @click.command()
 @click.option('-i', '--input', type=click.File('r'), required=True)
 def judge_intel(input: io.FileIO):
-    bundle = stix2.parse(input, version='2.1')
-    assert bundle.type == 'bundle'
-
-    app = IndicatorEvaluationReaderApplication(bundle)
+    raw = json.load(input)
+    assert raw.get('type') == 'bundle'
+
+    # the viewer only ever shows identities, indicators and opinions –
+    # wrap just those and skip deserializing/validating everything else
+    # in the bundle, which dominates startup for large files.
+    objects = [stix2.parse(obj, version='2.1', allow_custom=True)
+               for obj in raw['objects']
+               if obj['type'] in ('identity', 'indicator', 'opinion')]
+
+    app = IndicatorEvaluationReaderApplication(
+        objects,
+        journal_opinions=load_opinion_journal(input.name),
+    )
     app.run()
 
 